@@ -210,6 +210,7 @@ if user_df is not None:
                 user_features = extract_features(user_df_clean)
                 
                 st.session_state["user_features"] = user_features
+                st.session_state.pop("segment_totals", None)
                 st.session_state["extracted"] = True
                 st.success("✅ Insights extracted successfully!")
                 
@@ -429,6 +430,49 @@ if user_df is not None:
                     </div>
                     """, unsafe_allow_html=True)
 
+        from src.insights.segment_insights import compute_segment_totals, rank_segments, SEGMENT_LEVELS
+        st.markdown("## 🏆 Segment Rankings")
+        st.markdown("Page through the top and bottom performing regions, categories, products and months.")
+
+        col1, col2, col3 = st.columns(3)
+        segment_level = col1.selectbox("Segment level", SEGMENT_LEVELS,
+                                       format_func=lambda level: level.replace('_', ' ').title())
+        segment_metric = col2.selectbox("Rank by", ["revenue", "net_profit", "units_sold"])
+        page_size = col3.selectbox("Rows per page", [5, 10, 25], index=1)
+        page = st.number_input("Page", min_value=1, value=1, step=1, key="segment_page")
+
+        try:
+            # Reuse the rolled-up totals while only the page changes
+            totals_key = (str(date_range), revenue_filter, segment_metric, segment_level)
+            cached_totals = st.session_state.get("segment_totals")
+            if cached_totals is None or cached_totals[0] != totals_key:
+                totals = compute_segment_totals(filtered_df, segment_metric, [segment_level])[segment_level]
+                st.session_state["segment_totals"] = (totals_key, totals)
+            segment_rankings = rank_segments(
+                st.session_state["segment_totals"][1], k=page_size, offset=(page - 1) * page_size
+            )
+
+            if segment_rankings["total_segments"] == 0 or not segment_rankings["top"]:
+                st.info(f"No segments on this page ({segment_rankings['total_segments']} segments in total)")
+            else:
+                def rankings_table(rows):
+                    return pd.DataFrame([
+                        {"Rank": row["rank"], **row["segment"], segment_metric: row["value"]}
+                        for row in rows
+                    ])
+
+                top_col, bottom_col = st.columns(2)
+                top_col.markdown("#### 🔝 Top")
+                top_col.dataframe(rankings_table(segment_rankings["top"]), hide_index=True)
+                bottom_col.markdown("#### 🔻 Bottom")
+                bottom_col.dataframe(rankings_table(segment_rankings["bottom"]), hide_index=True)
+                st.caption(f"Showing ranks {segment_rankings['offset'] + 1}-"
+                           f"{segment_rankings['offset'] + len(segment_rankings['top'])} "
+                           f"of {segment_rankings['total_segments']} segments")
+
+        except ValueError as e:
+            st.error(f"❌ Segment rankings unavailable: {e}")
+
         from src.prediction.revenue_forecast import forecast_metric, plot_forecast
         st.markdown("## 🔮 Forecasting Insights")
         st.markdown("Analyze upcoming trends in your **Revenue** and **Net Profit** for better planning.")
@@ -0,0 +1,357 @@
+import pandas as pd
+import numpy as np
+import json
+import copy
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from pathlib import Path
+
+from src.preprocessing.clean_data import load_and_validate_data
+from src.features.extract_metrics import extract_features
+from src.insights.insights_engine import generate_business_insights
+from src.insights.segment_insights import compute_segment_totals, rank_segments, SEGMENT_LEVELS
+
+# Arrow payloads need pyarrow; without it only JSON payloads are served
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+# Same storage layout as the dashboard
+DATA_DIR = Path("data")
+USERS_FILE = DATA_DIR / "users.json"
+USER_DATASETS_DIR = DATA_DIR / "datasets"
+
+FORECAST_METRICS = ['revenue', 'net_profit']
+PAYLOAD_FORMATS = ['json', 'arrow']
+FILTER_PARAMS = ['start_date', 'end_date', 'min_revenue', 'max_revenue']
+CACHE_SIZE = 128
+FEATURES_CACHE_SIZE = 8
+
+
+class ResultCache:
+    """LRU cache that coalesces identical concurrent computations into one."""
+
+    def __init__(self, max_entries=CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._in_flight[key] = future
+
+        # Another thread is already computing this key, wait for its result
+        if not owner:
+            return future.result()
+
+        try:
+            result = compute()
+        except BaseException as e:
+            with self._lock:
+                del self._in_flight[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            del self._in_flight[key]
+            self._entries[key] = result
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        future.set_result(result)
+        return result
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_cache = ResultCache()
+# Parsed datasets get their own cache so paging traffic cannot evict them
+_features_cache = ResultCache(FEATURES_CACHE_SIZE)
+_hash_lock = threading.Lock()
+_dataset_hashes = {}
+
+
+class DatasetNotFoundError(LookupError):
+    """Raised when a user or one of their datasets does not exist."""
+
+
+def clear_cache():
+    _cache.clear()
+    _features_cache.clear()
+    with _hash_lock:
+        _dataset_hashes.clear()
+
+
+def _load_users():
+    return json.loads(USERS_FILE.read_text()) if USERS_FILE.exists() else {}
+
+
+def _user_datasets(username):
+    users = _load_users()
+    if username not in users:
+        raise DatasetNotFoundError(f"Unknown user: {username}")
+    return users[username]["datasets"]
+
+
+def list_datasets(username):
+    datasets = []
+    for dataset in _user_datasets(username):
+        if _dataset_path(username, dataset["id"]).exists():
+            datasets.append({
+                "id": dataset["id"],
+                "filename": dataset["filename"],
+                "upload_date": dataset["upload_date"]
+            })
+    return datasets
+
+
+def _dataset_path(username, dataset_id):
+    # Reject ids that would escape the user's dataset directory
+    user_dir = (USER_DATASETS_DIR / username).resolve()
+    filepath = (user_dir / f"{dataset_id}.csv").resolve()
+    if filepath.parent != user_dir or user_dir.parent != USER_DATASETS_DIR.resolve():
+        raise DatasetNotFoundError(f"Invalid dataset: {username}/{dataset_id}")
+    return filepath
+
+
+def _owned_dataset_path(username, dataset_id):
+    # Only serve datasets registered to the user, like the dashboard does
+    if not any(d["id"] == dataset_id for d in _user_datasets(username)):
+        raise DatasetNotFoundError(f"Unknown dataset: {username}/{dataset_id}")
+    filepath = _dataset_path(username, dataset_id)
+    if not filepath.exists():
+        raise DatasetNotFoundError(f"Unknown dataset: {username}/{dataset_id}")
+    return filepath
+
+
+def _read_dataset(filepath):
+    # Hash and parse the same bytes so features always match their digest
+    stat = filepath.stat()
+    data = filepath.read_bytes()
+    digest = hashlib.sha256(data).hexdigest()
+    with _hash_lock:
+        _dataset_hashes[filepath] = ((stat.st_mtime_ns, stat.st_size), digest)
+    return digest, data
+
+
+def _dataset_snapshot(filepath):
+    # Only re-read the file contents when it has changed on disk
+    stat = filepath.stat()
+    with _hash_lock:
+        cached = _dataset_hashes.get(filepath)
+    if cached and cached[0] == (stat.st_mtime_ns, stat.st_size):
+        return cached[1], None
+    return _read_dataset(filepath)
+
+
+def dataset_hash(username, dataset_id):
+    return _dataset_snapshot(_owned_dataset_path(username, dataset_id))[0]
+
+
+def _load_features(filepath):
+    digest, data = _dataset_snapshot(filepath)
+    features = _features_cache.get(digest)
+    if features is not None:
+        return digest, features
+
+    # Features were evicted while the hash stayed cached, read the file again
+    if data is None:
+        digest, data = _read_dataset(filepath)
+
+    # Same pipeline as the dashboard's "Extract Insights" step
+    def compute():
+        df = pd.read_csv(io.BytesIO(data))
+        return extract_features(load_and_validate_data(df))
+
+    return digest, _features_cache.get_or_compute(digest, compute)
+
+
+def filter_data(df, start_date=None, end_date=None, min_revenue=None, max_revenue=None):
+    df = df.copy()
+    df["date"] = pd.to_datetime(df["date"])
+
+    mask = pd.Series(True, index=df.index)
+    if start_date is not None:
+        mask &= df["date"] >= pd.to_datetime(start_date)
+    if end_date is not None:
+        mask &= df["date"] <= pd.to_datetime(end_date)
+    if min_revenue is not None:
+        mask &= df["revenue"] >= float(min_revenue)
+    if max_revenue is not None:
+        mask &= df["revenue"] <= float(max_revenue)
+    return df[mask]
+
+
+def _normalize_filters(filters):
+    # Equivalent values (100 / "100" / 100.0, "2023-01-01" / Timestamp) share one cache entry
+    unknown = [k for k in filters if k not in FILTER_PARAMS]
+    if unknown:
+        raise ValueError(f"Unknown filter(s): {', '.join(unknown)}. Choose from: {', '.join(FILTER_PARAMS)}")
+
+    normalized = {}
+    for key, value in filters.items():
+        if value is None:
+            continue
+        if key in ('start_date', 'end_date'):
+            normalized[key] = pd.to_datetime(value).isoformat()
+        else:
+            normalized[key] = float(value)
+    return normalized
+
+
+def _cached_shared(operation, username, dataset_id, params, compute):
+    filepath = _owned_dataset_path(username, dataset_id)
+    digest, features = _load_features(filepath)
+    key = (operation, digest, tuple(sorted(params.items())))
+
+    def checked_compute():
+        try:
+            return compute(features)
+        except KeyError as e:
+            # A missing column is a problem with the dataset, not a missing dataset
+            raise ValueError(f"Your dataset is missing a column needed for {operation}: {e.args[0]}") from e
+
+    return _cache.get_or_compute(key, checked_compute)
+
+
+def _cached(operation, username, dataset_id, params, compute):
+    return _copy_result(_cached_shared(operation, username, dataset_id, params, compute))
+
+
+def _copy_result(result):
+    # Cached results are shared, callers get their own copy to mutate
+    if isinstance(result, pd.DataFrame):
+        return result.copy()
+    return copy.deepcopy(result)
+
+
+def get_kpis(username, dataset_id, **filters):
+    filters = _normalize_filters(filters)
+
+    def compute(features):
+        filtered_df = filter_data(features, **filters)
+        return {
+            "rows": int(len(filtered_df)),
+            "total_revenue": _to_float(filtered_df["revenue"].sum()),
+            "net_profit": _to_float(filtered_df["net_profit"].sum()),
+            "avg_roi": _to_float(filtered_df["ROI (%)"].mean()),
+        }
+
+    return _cached("kpis", username, dataset_id, filters, compute)
+
+
+def get_insights(username, dataset_id, **filters):
+    filters = _normalize_filters(filters)
+
+    def compute(features):
+        filtered_df = filter_data(features, **filters)
+        if filtered_df.empty:
+            raise ValueError("No rows match the given filters.")
+        return generate_business_insights(filtered_df)
+
+    return _cached("insights", username, dataset_id, filters, compute)
+
+
+def get_segments(username, dataset_id, metric='revenue', k=5, offset=0, level=None, **filters):
+    filters = _normalize_filters(filters)
+    k, offset = int(k), int(offset)
+
+    levels = [level] if level else SEGMENT_LEVELS
+
+    def compute(features):
+        return compute_segment_totals(filter_data(features, **filters), metric, levels)
+
+    # Cache the rolled-up totals once per filter/metric, each page only ranks them
+    params = dict(filters, metric=metric, level=level or '')
+    totals = _cached_shared("segment_totals", username, dataset_id, params, compute)
+    return {lvl: rank_segments(totals[lvl], k, offset) for lvl in levels}
+
+
+def get_forecast(username, dataset_id, metric='revenue', **filters):
+    if metric not in FORECAST_METRICS:
+        raise ValueError(f"Unsupported forecast metric: {metric}. Choose one of: {', '.join(FORECAST_METRICS)}")
+    filters = _normalize_filters(filters)
+
+    def compute(features):
+        # Prophet is heavy to import, only pull it in when a forecast is requested
+        from src.prediction.revenue_forecast import forecast_metric
+
+        filtered_df = filter_data(features, **filters)
+        if filtered_df.empty:
+            raise ValueError("No rows match the given filters.")
+        forecast, _ = forecast_metric(filtered_df, metric)
+        return forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].reset_index(drop=True)
+
+    params = dict(filters, metric=metric)
+    return _cached("forecast", username, dataset_id, params, compute)
+
+
+def _to_float(value):
+    # NaN and +/-inf are not valid JSON, report them as missing
+    return float(value) if value is not None and np.isfinite(value) else None
+
+
+def _json_safe(value):
+    if isinstance(value, dict):
+        return {k: _json_safe(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_safe(v) for v in value]
+    if isinstance(value, (float, np.floating)):
+        return _to_float(value)
+    return value
+
+
+def _json_default(value):
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.bool_):
+        return bool(value)
+    if isinstance(value, (pd.Timestamp, pd.Period)):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def encode_payload(result, fmt='json'):
+    """Serialize a service result, returning (body_bytes, content_type)."""
+    if fmt not in PAYLOAD_FORMATS:
+        raise ValueError(f"Unsupported format: {fmt}. Choose one of: {', '.join(PAYLOAD_FORMATS)}")
+
+    if fmt == 'arrow':
+        if pa is None:
+            raise ValueError("Arrow payloads require pyarrow to be installed.")
+        if isinstance(result, pd.DataFrame):
+            table = pa.Table.from_pandas(result, preserve_index=False)
+        elif isinstance(result, list):
+            table = pa.Table.from_pylist(result)
+        else:
+            table = pa.Table.from_pylist([result])
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes(), "application/vnd.apache.arrow.stream"
+
+    if isinstance(result, pd.DataFrame):
+        body = result.to_json(orient='split', index=False, date_format='iso')
+    else:
+        body = json.dumps(_json_safe(result), separators=(',', ':'), default=_json_default, allow_nan=False)
+    return body.encode("utf-8"), "application/json"
@@ -0,0 +1,102 @@
+import argparse
+import json
+import os
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs, unquote
+
+# Adjust path for importing from src when run as a script
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from src.api.analytics_service import (
+    list_datasets, get_kpis, get_insights, get_segments, get_forecast, encode_payload,
+    DatasetNotFoundError, FILTER_PARAMS
+)
+
+# The server has NO authentication: any client that can reach it can read every
+# user's datasets. Keep it bound to loopback for local services only.
+LOOPBACK_HOSTS = ['127.0.0.1', 'localhost', '::1']
+
+# Routes:
+#   GET /datasets/<username>
+#   GET /datasets/<username>/<dataset_id>/kpis
+#   GET /datasets/<username>/<dataset_id>/insights
+#   GET /datasets/<username>/<dataset_id>/segments?metric=revenue&k=5&offset=0&level=region
+#   GET /datasets/<username>/<dataset_id>/forecast?metric=revenue|net_profit
+# Query parameters: start_date, end_date, min_revenue, max_revenue, format=json|arrow
+OPERATION_PARAMS = {
+    'segments': ['metric', 'k', 'offset', 'level'],
+    'forecast': ['metric'],
+}
+
+OPERATIONS = {
+    'kpis': get_kpis,
+    'insights': get_insights,
+    'segments': get_segments,
+    'forecast': get_forecast,
+}
+
+
+class AnalyticsRequestHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parts = [unquote(p) for p in url.path.strip("/").split("/") if p]
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        fmt = query.pop('format', 'json')
+
+        try:
+            if len(parts) == 2 and parts[0] == 'datasets':
+                result = list_datasets(parts[1])
+            elif len(parts) == 4 and parts[0] == 'datasets' and parts[3] in OPERATIONS:
+                allowed = FILTER_PARAMS + OPERATION_PARAMS.get(parts[3], [])
+                params = {k: query[k] for k in allowed if k in query}
+                result = OPERATIONS[parts[3]](parts[1], parts[2], **params)
+            else:
+                return self._send_error(404, f"Unknown route: {url.path}")
+            body, content_type = encode_payload(result, fmt)
+        except DatasetNotFoundError as e:
+            return self._send_error(404, str(e))
+        except ValueError as e:
+            return self._send_error(400, str(e))
+        except Exception as e:
+            return self._send_error(500, str(e))
+
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status, message):
+        body = json.dumps({"error": message}, separators=(',', ':')).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def run_server(host='127.0.0.1', port=8000):
+    if host not in LOOPBACK_HOSTS:
+        print(f"⚠️ Binding the unauthenticated analytics API to {host} exposes every user's datasets")
+    server = ThreadingHTTPServer((host, port), AnalyticsRequestHandler)
+    print(f"📡 Analytics API listening on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Serve business analytics over HTTP. The server is unauthenticated "
+                    "and must stay bound to loopback."
+    )
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="interface to bind (default: 127.0.0.1; do not expose publicly)")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+    run_server(args.host, args.port)
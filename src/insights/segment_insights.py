@@ -0,0 +1,97 @@
+import pandas as pd
+import numpy as np
+
+# Segment hierarchy, from coarsest to finest
+SEGMENT_HIERARCHY = ['region', 'category', 'product_name']
+SEGMENT_LEVELS = SEGMENT_HIERARCHY + ['month']
+
+
+def rank_segments(totals, k=5, offset=0):
+    """Top-k and bottom-k segments of a grouped series, starting at rank offset + 1."""
+    if k < 1 or offset < 0:
+        raise ValueError("k must be at least 1 and offset must not be negative.")
+    values = totals.to_numpy(dtype=float)
+    n = len(values)
+    stop = min(offset + k, n)
+
+    def select(keys):
+        if stop <= offset:
+            return []
+        # Partial selection: only segments up to the `stop`-th value are ordered.
+        # Widening to every segment tied with that value keeps pages consistent
+        # with one stable full ordering.
+        if stop < n:
+            threshold = keys[np.argpartition(keys, stop - 1)[:stop]].max()
+            idx = np.flatnonzero(keys <= threshold)
+        else:
+            idx = np.arange(n)
+        idx = idx[np.lexsort((idx, keys[idx]))][offset:stop]
+        return [
+            {
+                'rank': offset + i + 1,
+                'segment': _segment_labels(totals.index, pos),
+                'value': float(values[pos]),
+            }
+            for i, pos in enumerate(idx)
+        ]
+
+    return {
+        'total_segments': n,
+        'offset': offset,
+        'k': k,
+        'top': select(-values),
+        'bottom': select(values),
+    }
+
+
+def _segment_labels(index, pos):
+    key = index[pos]
+    if not isinstance(key, tuple):
+        key = (key,)
+    return {
+        name: str(value) if isinstance(value, pd.Period) else value
+        for name, value in zip(index.names, key)
+    }
+
+
+def compute_segment_totals(df, metric='revenue', levels=None):
+    """Metric totals per segment for each requested level, ready for rank_segments."""
+    levels = levels or SEGMENT_LEVELS
+    unknown_levels = [level for level in levels if level not in SEGMENT_LEVELS]
+    if unknown_levels:
+        raise ValueError(
+            f"Unknown segment level(s): {', '.join(unknown_levels)}. "
+            f"Choose from: {', '.join(SEGMENT_LEVELS)}"
+        )
+
+    # Only group as deep into the hierarchy as the requested levels need
+    depth = max([SEGMENT_HIERARCHY.index(level) + 1 for level in levels if level in SEGMENT_HIERARCHY], default=0)
+    needed_cols = [metric] + SEGMENT_HIERARCHY[:depth] + (['date'] if 'month' in levels else [])
+    missing_cols = [col for col in needed_cols if col not in df.columns]
+    if missing_cols:
+        raise ValueError(f"Your dataset is missing these columns for segment insights: {', '.join(missing_cols)}")
+    if not pd.api.types.is_numeric_dtype(df[metric]):
+        raise ValueError(f"Segment metric must be a numeric column, got '{metric}' ({df[metric].dtype})")
+
+    totals = {}
+    if depth:
+        # One grouped reduction at the finest requested grain; coarser levels are rolled up from it
+        rollup = df.groupby(SEGMENT_HIERARCHY[:depth], sort=False)[metric].sum()
+        for d in range(depth, 0, -1):
+            if d < depth:
+                rollup = rollup.groupby(level=SEGMENT_HIERARCHY[:d], sort=False).sum()
+            if SEGMENT_HIERARCHY[d - 1] in levels:
+                totals[SEGMENT_HIERARCHY[d - 1]] = rollup
+
+    # Months are reduced on their own so they don't multiply the product grain
+    if 'month' in levels:
+        month = pd.to_datetime(df['date']).dt.to_period('M').rename('month')
+        totals['month'] = df[metric].groupby(month, sort=False).sum()
+
+    return totals
+
+
+def generate_segment_insights(df, metric='revenue', k=5, offset=0, levels=None):
+    levels = levels or SEGMENT_LEVELS
+    totals = compute_segment_totals(df, metric, levels)
+    return {level: rank_segments(totals[level], k, offset) for level in levels}
@@ -0,0 +1,44 @@
+import json
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+# Adjust path for importing from src
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.api import analytics_service as service  # noqa: E402
+
+SAMPLE_CSV = os.path.join(
+    os.path.dirname(__file__), "..", "data", "datasets", "siddhu",
+    "9d50871c-ed8d-4acf-8bed-30d8ccee508e.csv"
+)
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    datasets_dir = tmp_path / "datasets"
+    (datasets_dir / "alice").mkdir(parents=True)
+    (datasets_dir / "bob").mkdir()
+    pd.read_csv(SAMPLE_CSV).head(30).to_csv(datasets_dir / "alice" / "d1.csv", index=False)
+    pd.read_csv(SAMPLE_CSV).head(30).to_csv(datasets_dir / "bob" / "b1.csv", index=False)
+    # On disk but not registered to alice
+    pd.read_csv(SAMPLE_CSV).head(5).to_csv(datasets_dir / "alice" / "stray.csv", index=False)
+
+    users = {
+        "alice": {"name": "Alice", "password": "", "datasets": [
+            {"id": "d1", "filename": "sales.csv", "upload_date": "2025-01-01T00:00:00"}
+        ]},
+        "bob": {"name": "Bob", "password": "", "datasets": [
+            {"id": "b1", "filename": "bob.csv", "upload_date": "2025-01-01T00:00:00"}
+        ]},
+    }
+    users_file = tmp_path / "users.json"
+    users_file.write_text(json.dumps(users))
+
+    monkeypatch.setattr(service, "USERS_FILE", users_file)
+    monkeypatch.setattr(service, "USER_DATASETS_DIR", datasets_dir)
+    service.clear_cache()
+    yield datasets_dir
+    service.clear_cache()
@@ -0,0 +1,233 @@
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.api import analytics_service as service
+from src.api.analytics_service import DatasetNotFoundError, ResultCache
+from conftest import SAMPLE_CSV
+
+
+@pytest.fixture
+def load_calls(monkeypatch):
+    calls = []
+    original = service.load_and_validate_data
+
+    def counting(df):
+        calls.append(1)
+        return original(df)
+
+    monkeypatch.setattr(service, "load_and_validate_data", counting)
+    return calls
+
+
+def test_list_datasets_only_returns_registered(data_dir):
+    assert [d["id"] for d in service.list_datasets("alice")] == ["d1"]
+    with pytest.raises(DatasetNotFoundError):
+        service.list_datasets("nobody")
+
+
+def test_kpis_are_cached(data_dir, load_calls):
+    first = service.get_kpis("alice", "d1")
+    second = service.get_kpis("alice", "d1")
+    assert first == second
+    assert first["rows"] == 30
+    assert len(load_calls) == 1
+    assert len(service._cache._entries) == 1
+
+
+def test_cached_results_are_copies(data_dir):
+    kpis = service.get_kpis("alice", "d1")
+    kpis["rows"] = -1
+    insights = service.get_insights("alice", "d1")
+    insights.clear()
+    assert service.get_kpis("alice", "d1")["rows"] == 30
+    assert service.get_insights("alice", "d1")
+
+
+def test_paging_does_not_evict_features(data_dir, load_calls, monkeypatch):
+    monkeypatch.setattr(service._cache, "max_entries", 2)
+    for offset in range(5):
+        service.get_segments("alice", "d1", k=1, offset=offset, level="region")
+        service.get_kpis("alice", "d1", min_revenue=offset)
+    assert len(load_calls) == 1
+
+
+def test_equivalent_filters_share_cache_entry(data_dir):
+    by_int = service.get_kpis("alice", "d1", min_revenue=100, start_date="2023-02-01")
+    by_str = service.get_kpis("alice", "d1", min_revenue="100.0", start_date=pd.Timestamp("2023-02-01"))
+    assert by_int == by_str
+    assert len(service._cache._entries) == 1
+    service.get_kpis("alice", "d1", min_revenue=101)
+    assert len(service._cache._entries) == 2
+
+
+def test_segment_pages_reuse_cached_totals(data_dir, monkeypatch):
+    calls = []
+    original = service.compute_segment_totals
+
+    def counting(*args, **kwargs):
+        calls.append(1)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(service, "compute_segment_totals", counting)
+    pages = [service.get_segments("alice", "d1", k=3, offset=offset, level="product_name")
+             for offset in range(0, 30, 3)]
+    assert len(calls) == 1
+
+    names = [tuple(row["segment"].values()) for page in pages for row in page["product_name"]["top"]]
+    assert len(names) == len(set(names)) == pages[0]["product_name"]["total_segments"]
+
+
+def test_empty_and_missing_segment_level_agree(data_dir):
+    assert service.get_segments("alice", "d1", level="") == service.get_segments("alice", "d1", level=None)
+
+
+def test_changed_file_invalidates_cache(data_dir, load_calls):
+    before = service.get_kpis("alice", "d1")
+    path = data_dir / "alice" / "d1.csv"
+    pd.read_csv(SAMPLE_CSV).head(10).to_csv(path, index=False)
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    after = service.get_kpis("alice", "d1")
+    assert after["rows"] == 10
+    assert before["rows"] == 30
+    assert len(load_calls) == 2
+
+
+def test_features_reloaded_after_eviction(data_dir, load_calls):
+    service.get_kpis("alice", "d1")
+    service._features_cache.clear()
+    assert service.get_kpis("alice", "d1")["rows"] == 30
+    assert len(load_calls) == 2
+
+
+def test_concurrent_identical_requests_are_coalesced():
+    cache = ResultCache()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.2)
+        return object()
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute("k", slow)))
+               for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert len(results) == 8
+    assert all(r is results[0] for r in results)
+
+
+def test_failed_computation_is_not_cached():
+    cache = ResultCache()
+
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        cache.get_or_compute("k", fail)
+    assert cache.get_or_compute("k", lambda: 1) == 1
+
+
+def test_cache_evicts_least_recently_used():
+    cache = ResultCache(max_entries=2)
+    cache.get_or_compute("a", lambda: 1)
+    cache.get_or_compute("b", lambda: 2)
+    cache.get("a")
+    cache.get_or_compute("c", lambda: 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+
+
+@pytest.mark.parametrize("username, dataset_id", [
+    ("alice", "../bob/b1"),
+    ("../datasets/bob", "b1"),
+    ("alice", "stray"),
+    ("alice", "b1"),
+    ("nobody", "d1"),
+])
+def test_unknown_or_foreign_datasets_are_rejected(data_dir, username, dataset_id):
+    with pytest.raises(DatasetNotFoundError):
+        service.get_kpis(username, dataset_id)
+
+
+def test_missing_column_is_a_value_error(data_dir):
+    path = data_dir / "alice" / "d1.csv"
+    pd.read_csv(SAMPLE_CSV).head(30).drop(columns=["region"]).to_csv(path, index=False)
+    with pytest.raises(ValueError, match="region"):
+        service.get_insights("alice", "d1")
+
+
+def test_invalid_filters_are_value_errors(data_dir):
+    with pytest.raises(ValueError):
+        service.get_kpis("alice", "d1", min_revenue="lots")
+    with pytest.raises(ValueError):
+        service.get_kpis("alice", "d1", region="Delhi")
+
+
+def test_json_payload(data_dir):
+    kpis = service.get_kpis("alice", "d1")
+    body, content_type = service.encode_payload(kpis, "json")
+    assert content_type == "application/json"
+    assert json.loads(body) == kpis
+
+    frame = pd.DataFrame({"ds": pd.to_datetime(["2023-01-01"]), "yhat": [1.5]})
+    decoded = json.loads(service.encode_payload(frame, "json")[0])
+    assert decoded["columns"] == ["ds", "yhat"]
+    assert decoded["data"][0][1] == 1.5
+
+
+def test_arrow_payload(data_dir):
+    pa = pytest.importorskip("pyarrow")
+    frame = pd.DataFrame({"ds": pd.to_datetime(["2023-01-01", "2023-01-08"]), "yhat": [1.5, 2.5]})
+    body, content_type = service.encode_payload(frame, "arrow")
+    assert content_type == "application/vnd.apache.arrow.stream"
+    table = pa.ipc.open_stream(body).read_all()
+    assert table.to_pandas()["yhat"].tolist() == [1.5, 2.5]
+
+    kpis = service.get_kpis("alice", "d1")
+    row = pa.ipc.open_stream(service.encode_payload(kpis, "arrow")[0]).read_all().to_pylist()[0]
+    assert row == kpis
+
+
+def test_json_payload_keeps_integers_and_drops_non_finite():
+    result = {
+        "segment": {"product_name": np.int64(2002)},
+        "values": [np.float64(np.inf), float("-inf"), float("nan"), 1.5, np.float32(2.5)],
+    }
+    decoded = json.loads(service.encode_payload(result, "json")[0])
+    assert decoded["segment"]["product_name"] == 2002
+    assert isinstance(decoded["segment"]["product_name"], int)
+    assert decoded["values"] == [None, None, None, 1.5, 2.5]
+
+
+def test_infinite_roi_is_served_as_null(data_dir):
+    path = data_dir / "alice" / "d1.csv"
+    df = pd.read_csv(SAMPLE_CSV).head(30)
+    df.loc[0, "investment_cost"] = 0
+    df.to_csv(path, index=False)
+    kpis = service.get_kpis("alice", "d1")
+    assert kpis["avg_roi"] is None
+    assert json.loads(service.encode_payload(kpis, "json")[0])["avg_roi"] is None
+
+
+def test_unknown_payload_format(data_dir):
+    with pytest.raises(ValueError):
+        service.encode_payload({}, "xml")
+
+
+@pytest.mark.parametrize("metric", ["date", "region"])
+def test_non_numeric_segment_metric_is_a_value_error(data_dir, metric):
+    with pytest.raises(ValueError, match="numeric"):
+        service.get_segments("alice", "d1", metric=metric)
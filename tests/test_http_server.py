@@ -0,0 +1,110 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pandas as pd
+import pytest
+
+from src.api import analytics_service as service
+from src.api import http_server
+from src.api.http_server import AnalyticsRequestHandler, ThreadingHTTPServer
+from conftest import SAMPLE_CSV
+
+
+@pytest.fixture
+def server(data_dir):
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), AnalyticsRequestHandler)
+    thread = threading.Thread(target=httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def fetch(url):
+    try:
+        with urllib.request.urlopen(url) as response:
+            return response.status, response.headers["Content-Type"], response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers["Content-Type"], e.read()
+
+
+def test_list_datasets(server):
+    status, content_type, body = fetch(f"{server}/datasets/alice")
+    assert status == 200
+    assert content_type == "application/json"
+    assert [d["id"] for d in json.loads(body)] == ["d1"]
+
+
+def test_kpis_with_filters(server):
+    status, _, body = fetch(f"{server}/datasets/alice/d1/kpis?min_revenue=5000&max_revenue=1e9")
+    assert status == 200
+    assert json.loads(body) == service.get_kpis("alice", "d1", min_revenue=5000, max_revenue=1e9)
+
+
+def test_query_params_are_whitelisted_per_operation(server):
+    # metric/k are ignored on kpis, level is passed to segments
+    status, _, body = fetch(f"{server}/datasets/alice/d1/kpis?metric=date&k=abc")
+    assert status == 200
+    assert json.loads(body)["rows"] == 30
+
+    status, _, body = fetch(f"{server}/datasets/alice/d1/segments?level=region&k=2&offset=1")
+    assert status == 200
+    result = json.loads(body)
+    assert list(result) == ["region"]
+    assert [row["rank"] for row in result["region"]["top"]] == [2, 3]
+
+
+def test_arrow_format(server):
+    pa = pytest.importorskip("pyarrow")
+    status, content_type, body = fetch(f"{server}/datasets/alice/d1/kpis?format=arrow")
+    assert status == 200
+    assert content_type == "application/vnd.apache.arrow.stream"
+    assert pa.ipc.open_stream(body).read_all().to_pylist()[0]["rows"] == 30
+
+
+@pytest.mark.parametrize("path", [
+    "/datasets/nobody",
+    "/datasets/alice/stray/kpis",
+    "/datasets/alice/b1/kpis",
+    "/datasets/alice/..%2Fbob%2Fb1/kpis",
+    "/datasets/alice/d1/unknown",
+    "/unknown",
+])
+def test_not_found(server, path):
+    status, content_type, body = fetch(f"{server}{path}")
+    assert status == 404
+    assert content_type == "application/json"
+    assert "error" in json.loads(body)
+
+
+@pytest.mark.parametrize("path", [
+    "/datasets/alice/d1/kpis?min_revenue=lots",
+    "/datasets/alice/d1/kpis?format=xml",
+    "/datasets/alice/d1/segments?metric=date",
+    "/datasets/alice/d1/segments?k=0",
+    "/datasets/alice/d1/forecast?metric=orders",
+])
+def test_bad_request(server, path):
+    status, _, body = fetch(f"{server}{path}")
+    assert status == 400
+    assert json.loads(body)["error"]
+
+
+def test_missing_column_is_bad_request(server, data_dir):
+    path = data_dir / "alice" / "d1.csv"
+    pd.read_csv(SAMPLE_CSV).head(30).drop(columns=["region"]).to_csv(path, index=False)
+    status, _, body = fetch(f"{server}/datasets/alice/d1/insights")
+    assert status == 400
+    assert "region" in json.loads(body)["error"]
+
+
+def test_unexpected_error_is_server_error(server, monkeypatch):
+    def broken(*args, **kwargs):
+        raise RuntimeError("boom")
+
+    monkeypatch.setitem(http_server.OPERATIONS, "kpis", broken)
+    status, _, body = fetch(f"{server}/datasets/alice/d1/kpis")
+    assert status == 500
+    assert json.loads(body) == {"error": "boom"}
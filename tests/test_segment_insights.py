@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.insights.segment_insights import compute_segment_totals, generate_segment_insights, rank_segments
+
+
+def sample_data(n_rows=2000, n_products=300, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'date': pd.to_datetime('2023-01-01') + pd.to_timedelta(rng.integers(0, 365, n_rows), unit='D'),
+        'region': rng.choice(['North', 'South', 'East', 'West'], n_rows),
+        'category': rng.choice(['Hardware', 'Electronics', 'Accessories'], n_rows),
+        'product_name': [f"P{i:04d}" for i in rng.integers(0, n_products, n_rows)],
+        'revenue': rng.uniform(10, 1000, n_rows).round(2),
+        'units_sold': rng.integers(0, 5, n_rows),
+    })
+
+
+@pytest.mark.parametrize("values", [
+    np.random.default_rng(1).uniform(0, 100, 200),
+    np.random.default_rng(2).integers(0, 5, 200).astype(float),
+])
+@pytest.mark.parametrize("page_size", [1, 7, 10, 200, 500])
+def test_paging_matches_stable_full_sort(values, page_size):
+    totals = pd.Series(values, index=pd.Index([f"P{i:03d}" for i in range(len(values))], name='product_name'))
+    expected = {
+        'top': totals.sort_values(ascending=False, kind='stable'),
+        'bottom': totals.sort_values(ascending=True, kind='stable'),
+    }
+
+    for side, ordered in expected.items():
+        rows = []
+        for offset in range(0, len(totals) + page_size, page_size):
+            rows += rank_segments(totals, page_size, offset)[side]
+
+        names = [row['segment']['product_name'] for row in rows]
+        assert names == list(ordered.index)
+        assert len(set(names)) == len(totals)
+        assert [row['value'] for row in rows] == list(ordered.values)
+        assert [row['rank'] for row in rows] == list(range(1, len(totals) + 1))
+
+
+def test_page_past_the_end_is_empty():
+    totals = pd.Series([3.0, 1.0, 2.0], index=pd.Index(['a', 'b', 'c'], name='region'))
+    result = rank_segments(totals, k=5, offset=3)
+    assert result['top'] == [] and result['bottom'] == []
+    assert result['total_segments'] == 3
+
+
+@pytest.mark.parametrize("metric", ['revenue', 'units_sold'])
+def test_rollups_match_direct_groupby(metric):
+    df = sample_data()
+    months = df['date'].dt.to_period('M').rename('month')
+    direct = {
+        'region': df.groupby('region')[metric].sum(),
+        'category': df.groupby(['region', 'category'])[metric].sum(),
+        'product_name': df.groupby(['region', 'category', 'product_name'])[metric].sum(),
+        'month': df.groupby(months)[metric].sum(),
+    }
+
+    result = generate_segment_insights(df, metric=metric, k=len(df))
+    for level, expected in direct.items():
+        rows = result[level]['top']
+        assert result[level]['total_segments'] == len(expected)
+        got = {
+            tuple(str(v) for v in row['segment'].values()): row['value']
+            for row in rows
+        }
+        want = {
+            tuple(str(v) for v in (key if isinstance(key, tuple) else (key,))): float(value)
+            for key, value in expected.items()
+        }
+        assert got.keys() == want.keys()
+        for key, value in want.items():
+            assert got[key] == pytest.approx(value)
+
+
+@pytest.mark.parametrize("metric", ['date', 'region'])
+def test_non_numeric_metric_is_rejected(metric):
+    with pytest.raises(ValueError, match="numeric"):
+        generate_segment_insights(sample_data(100), metric=metric)
+
+
+def test_invalid_level_and_paging_arguments():
+    df = sample_data(100)
+    with pytest.raises(ValueError):
+        generate_segment_insights(df, levels=['country'])
+    with pytest.raises(ValueError):
+        generate_segment_insights(df, k=0)
+    with pytest.raises(ValueError):
+        generate_segment_insights(df, offset=-1)
+
+
+def test_single_level_only_needs_its_own_columns():
+    df = sample_data(500)
+    totals = compute_segment_totals(df[['region', 'revenue']], levels=['region'])
+    assert list(totals) == ['region']
+    pd.testing.assert_series_equal(
+        totals['region'].sort_index(), df.groupby('region')['revenue'].sum(), check_names=False
+    )
+
+    with pytest.raises(ValueError, match="date"):
+        compute_segment_totals(df[['region', 'revenue']], levels=['month'])
+
+
+def test_month_totals_match_direct_groupby():
+    df = sample_data(500)
+    totals = compute_segment_totals(df, levels=['month'])['month']
+    expected = df.groupby(df['date'].dt.to_period('M'))['revenue'].sum()
+    assert totals.sort_index().tolist() == pytest.approx(expected.tolist())